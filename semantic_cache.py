@@ -0,0 +1,74 @@
+# semantic_cache.py
+"""
+Semantic lookup over the response cache: maps embeddings of previously generated
+topics to their exact cache keys, so near-duplicate topics can reuse a stored result.
+"""
+
+import os
+import threading
+import numpy as np
+import orjson
+
+
+def _normalize(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SemanticIndex:
+    """
+    An append-only JSONL file of {"scope", "key", "vector"} entries, loaded into memory on first use.
+
+    scope holds the exact-match part of a request (tone, article type, keyword count, ...)
+    so only entries generated with the same settings are compared. In memory each scope is a
+    list of keys plus a contiguous float32 matrix of their normalized vectors, so a lookup is
+    one BLAS matrix-vector product instead of a Python loop over entries.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._scopes = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._scopes is None:
+            rows = {}
+            try:
+                with open(self.path, "rb") as f:
+                    for line in f:
+                        if line.strip():
+                            entry = orjson.loads(line)
+                            keys, vectors = rows.setdefault(entry["scope"], ([], []))
+                            keys.append(entry["key"])
+                            vectors.append(entry["vector"])
+            except FileNotFoundError:
+                pass
+            self._scopes = {
+                scope: (keys, np.asarray(vectors, dtype=np.float32))
+                for scope, (keys, vectors) in rows.items()
+            }
+        return self._scopes
+
+    def search(self, scope, vector, threshold):
+        """Return the cache key of the most similar entry in scope, or None if none reaches threshold."""
+        query = _normalize(vector)
+        with self._lock:
+            keys, matrix = self._load().get(scope, ((), None))
+        if not keys:
+            return None
+        # Rows and query are unit length, so these are the cosine similarities
+        scores = matrix @ query
+        best = int(np.argmax(scores))
+        return keys[best] if scores[best] >= threshold else None
+
+    def add(self, scope, vector, key):
+        row = _normalize(vector)
+        with self._lock:
+            scopes = self._load()
+            keys, matrix = scopes.get(scope, ((), np.empty((0, row.size), dtype=np.float32)))
+            # Swap in new objects rather than mutating, so a concurrent search sees a consistent pair
+            scopes[scope] = ([*keys, key], np.vstack([matrix, row]))
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "ab") as f:
+                f.write(orjson.dumps({"scope": scope, "key": key, "vector": row.tolist()}) + b"\n")
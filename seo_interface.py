@@ -3,48 +3,58 @@
 User interfaces for SEO tools: CLI (Click) and interactive terminal mode.
 """
 
-import os
+import asyncio
 import click
 from seo_tools import (
-    generate_keywords_with_tools, display_keywords, get_flat_keywords_list, save_keywords_to_file,
-    generate_article_with_tools, save_article_and_keywords
+    generate_keywords_with_tools, display_keywords, save_keywords_to_file, save_article_and_keywords,
+    agenerate_seo_content, agenerate_article_with_keywords, agenerate_and_save_many,
+    submit_article_batch, wait_for_batch, collect_article_batch,
+    run_archive_path, save_article, clear_cache, CACHE_DIR, OPENAI_API_KEY, DEFAULT_MODEL
 )
-import json
 
+TONES = ("formal", "informal", "conversational", "professional")
+ARTICLE_TYPES = ("guide", "review", "how-to", "list", "comparison")
+_VALID_TONES = frozenset(TONES)
+_VALID_ARTICLE_TYPES = frozenset(ARTICLE_TYPES)
+MODELS = tuple(dict.fromkeys((DEFAULT_MODEL, "gpt-4.1-mini", "gpt-4.1", "gpt-4o-mini", "gpt-4o", "gpt-4", "gpt-4-turbo", "gpt-3.5-turbo-16k")))
 
+# Menus are built once and printed with a single call, and only after the topic has been accepted
+_HEADER = "🚀 SEO Article Generator\n" + "=" * 40
+_TONE_MENU = "\n".join([
+    "\n📝 Available tones:",
+    "- formal: Professional and authoritative",
+    "- informal: Casual and friendly",
+    "- conversational: Chatty and engaging",
+    "- professional: Business-like and polished"
+])
+_ARTICLE_TYPE_MENU = "\n".join([
+    "\n📄 Available article types:",
+    "- guide: How-to guide or tutorial",
+    "- review: Product or service review",
+    "- how-to: Step-by-step instructions",
+    "- list: Listicle or numbered content",
+    "- comparison: Compare different options"
+])
 
 def get_user_input():
-    print("🚀 SEO Article Generator")
-    print("=" * 40)
+    print(_HEADER)
     topic = input("Enter your topic: ").strip()
     if not topic:
         print("❌ Topic is required!")
         return None
-    print("\n📝 Available tones:")
-    print("- formal: Professional and authoritative")
-    print("- informal: Casual and friendly")
-    print("- conversational: Chatty and engaging")
-    print("- professional: Business-like and polished")
+    print(_TONE_MENU)
     tone = input("Enter tone (formal/informal/conversational/professional): ").strip().lower()
-    valid_tones = ["formal", "informal", "conversational", "professional"]
-    if tone not in valid_tones:
-        print(f"❌ Invalid tone. Please choose from: {', '.join(valid_tones)}")
+    if tone not in _VALID_TONES:
+        print(f"❌ Invalid tone. Please choose from: {', '.join(TONES)}")
         return None
 
-    print("\n📄 Available article types:")
-    print("- guide: How-to guide or tutorial")
-    print("- review: Product or service review")
-    print("- how-to: Step-by-step instructions")
-    print("- list: Listicle or numbered content")
-    print("- comparison: Compare different options")
+    print(_ARTICLE_TYPE_MENU)
     article_type = input("Enter article type (guide/review/how-to/list/comparison): ").strip().lower()
-    valid_types = ["guide", "review", "how-to", "list", "comparison"]
-    if article_type not in valid_types:
-        print(f"❌ Invalid article type. Please choose from: {', '.join(valid_types)}")
+    if article_type not in _VALID_ARTICLE_TYPES:
+        print(f"❌ Invalid article type. Please choose from: {', '.join(ARTICLE_TYPES)}")
         return None
     
-    # Use gpt-4.1 as default for Responses API
-    selected_model = 'gpt-4.1'
+    selected_model = DEFAULT_MODEL
     
     return {
         "topic": topic,
@@ -54,46 +64,57 @@ def get_user_input():
     }
 
 # --- Interactive Terminal Mode ---
+def run(inputs, *, use_cache=True, on_keywords=None, on_section=None):
+    """
+    Generate keywords and an article for one set of inputs through the shared
+    keyword -> article pipeline used by the batch command.
+    Returns (keywords_data, article_data).
+    """
+    return asyncio.run(agenerate_seo_content(
+        inputs['topic'],
+        inputs['tone'],
+        inputs['article_type'],
+        inputs['model'],
+        use_cache=use_cache,
+        on_keywords=on_keywords,
+        on_section=on_section
+    ))
+
+def _show_keywords(keywords_data, article_keyword):
+    display_keywords(keywords_data)
+    if keywords_data.get('keywords', {}).get('primary_keywords'):
+        print(f"\n📝 Using keyword for article: '{article_keyword}'")
+    else:
+        print(f"\n📝 Using original topic for article: '{article_keyword}'")
+    print(f"\n⏳ Generating article...")
+
+def _show_section(section):
+    print(f"   ✍️  {section.get('heading', '')}")
+
 def interactive_main():
     inputs = get_user_input()
     if not inputs:
         print("❌ Invalid inputs. Please try again.")
         return
-    print(f"\n🎯 Topic: {inputs['topic']}")
-    print(f"📝 Tone: {inputs['tone']}")
-    print(f"📄 Article type: {inputs['article_type']}")
-    print(f"🤖 Model: {inputs['model']}")
-    
-    # Show model info
-    print(f"🤖 Model: {inputs['model']}")
-    
-    print("\n🔍 Generating keywords...")
+    print("\n".join([
+        f"\n🎯 Topic: {inputs['topic']}",
+        f"📝 Tone: {inputs['tone']}",
+        f"📄 Article type: {inputs['article_type']}",
+        f"🤖 Model: {inputs['model']}",
+        "\n🔍 Generating keywords..."
+    ]))
     try:
-        keywords_data = generate_keywords_with_tools(inputs['topic'], 15)
+        keywords_data, data = run(inputs, on_keywords=_show_keywords, on_section=_show_section)
         if keywords_data:
-            display_keywords(keywords_data)
-            primary_keywords = keywords_data.get('keywords', {}).get('primary_keywords', [])
-            if primary_keywords:
-                article_keyword = primary_keywords[0]
-                print(f"\n📝 Using keyword for article: '{article_keyword}'")
-            else:
-                article_keyword = inputs['topic']
-                print(f"\n📝 Using original topic for article: '{article_keyword}'")
-            print(f"\n⏳ Generating article...")
-            data = generate_article_with_tools(
-                article_keyword,
-                inputs['tone'],
-                inputs['article_type'],
-                model=inputs['model']
-            )
             if data:
                 json_path, md_path, keywords_path = save_article_and_keywords(data, keywords_data, inputs['topic'])
-                print(f"\n✅ Files saved to:")
-                print(f"   📄 Article JSON: {json_path}")
-                print(f"   📝 Article Markdown: {md_path}")
-                print(f"   🔍 Keywords JSON: {keywords_path}")
-                
-                print(f"✅ Article generated successfully!")
+                print("\n".join([
+                    f"\n✅ Files saved to:",
+                    f"   📄 Article JSON: {json_path}",
+                    f"   📝 Article Markdown: {md_path}",
+                    f"   🔍 Keywords JSON: {keywords_path}",
+                    f"✅ Article generated successfully!"
+                ]))
             else:
                 print("❌ Failed to generate article.")
         else:
@@ -103,6 +124,17 @@ def interactive_main():
         print("Please check your OpenAI API key and internet connection.")
 
 # --- CLI Mode (Click) ---
+def _has_api_key():
+    """Check the key resolved at import, printing setup instructions when it is missing."""
+    if OPENAI_API_KEY:
+        return True
+    click.echo("\n".join([
+        "❌ Error: OPENAI_API_KEY not found in environment variables.",
+        "Please create a .env file with your OpenAI API key:",
+        "OPENAI_API_KEY=your_api_key_here"
+    ]))
+    return False
+
 @click.group()
 def cli():
     """SEO Agent - Generate SEO-optimized articles and keywords"""
@@ -110,62 +142,34 @@ def cli():
 
 @cli.command()
 @click.option('--keyword', '-k', prompt='Enter your target topic', help='The main topic to target')
-@click.option('--tone', '-t', default='informal', type=click.Choice(['formal', 'informal', 'conversational', 'professional']), help='Tone of the article')
+@click.option('--tone', '-t', default='informal', type=click.Choice(TONES), help='Tone of the article')
 
-@click.option('--article-type', '-a', default='guide', type=click.Choice(['guide', 'review', 'how-to', 'list', 'comparison']), help='Type of article to generate')
-@click.option('--model', '-m', default='gpt-4', type=click.Choice(['gpt-4', 'gpt-4-turbo', 'gpt-3.5-turbo-16k']), help='OpenAI model to use')
-def article(keyword, tone, article_type, model):
+@click.option('--article-type', '-a', default='guide', type=click.Choice(ARTICLE_TYPES), help='Type of article to generate')
+@click.option('--model', '-m', default=DEFAULT_MODEL, type=click.Choice(MODELS), help='OpenAI model to use')
+@click.option('--no-cache', is_flag=True, help='Ignore cached results and call the OpenAI API')
+def article(keyword, tone, article_type, model, no_cache):
     """Generate SEO-optimized articles using OpenAI"""
-    if not os.getenv("OPENAI_API_KEY"):
-        click.echo("❌ Error: OPENAI_API_KEY not found in environment variables.")
-        click.echo("Please create a .env file with your OpenAI API key:")
-        click.echo("OPENAI_API_KEY=your_api_key_here")
+    if not _has_api_key():
         return
-    output_dir = os.path.expanduser('~/SEO articles')
-    os.makedirs(output_dir, exist_ok=True)
-    click.echo(f"\n🚀 Generating SEO article...")
-    click.echo(f"Topic: {keyword}")
-    click.echo(f"Tone: {tone}")
-    click.echo(f"Article type: {article_type}")
-    click.echo(f"Model: {model}")
-    
-    # Show model info
-    click.echo(f"Model: {model}")
-    
-    click.echo("-" * 50)
+    click.echo("\n".join([
+        f"\n🚀 Generating SEO article...",
+        f"Topic: {keyword}",
+        f"Tone: {tone}",
+        f"Article type: {article_type}",
+        f"Model: {model}",
+        "-" * 50
+    ]))
     try:
-        flat_keywords_obj = get_flat_keywords_list(keyword, 15)
-        flat_keywords = flat_keywords_obj["keywords"]
-        data = generate_article_with_tools(keyword, tone, article_type, keywords_list=flat_keywords, model=model)
+        data = asyncio.run(agenerate_article_with_keywords(
+            keyword, tone, article_type, model=model, use_cache=not no_cache, on_section=_show_section
+        ))
         if data:
-            slug = keyword.lower().replace(" ", "-").replace("/", "-")
-            json_path = os.path.join(output_dir, f"article-{slug}.json")
-            md_path = os.path.join(output_dir, f"article-{slug}.md")
-            with open(json_path, "w", encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            with open(md_path, "w", encoding='utf-8') as f:
-                f.write(f"# {data.get('article_title', 'Article Title')}\n\n")
-                if 'meta_title' in data:
-                    f.write(f"**Meta Title:** {data['meta_title']}\n\n")
-                if 'meta_description' in data:
-                    f.write(f"**Meta Description:** {data['meta_description']}\n\n")
-                for section in data.get('article_sections', []):
-                    f.write(f"## {section['heading']}\n{section['content']}\n\n")
-                if 'faq' in data and data['faq']:
-                    f.write("## Frequently Asked Questions\n\n")
-                    for faq in data['faq']:
-                        f.write(f"**Q: {faq['question']}**\n")
-                        f.write(f"A: {faq['answer']}\n\n")
-                if 'seo_tips' in data and data['seo_tips']:
-                    f.write("## SEO Optimization Tips\n\n")
-                    for tip in data['seo_tips']:
-                        f.write(f"- {tip}\n")
-                    f.write("\n")
-            click.echo(f"\n✅ Article generated successfully!")
-            click.echo(f"📄 JSON: {json_path}")
-            click.echo(f"📝 Markdown: {md_path}")
-            
-            click.echo(f"✅ Article generated successfully!")
+            json_path, md_path = save_article(data, keyword)
+            click.echo("\n".join([
+                f"\n✅ Article generated successfully!",
+                f"📄 JSON: {json_path}",
+                f"📝 Markdown: {md_path}"
+            ]))
         else:
             click.echo("❌ Failed to generate article. Please check your OpenAI API key and try again.")
     except Exception as e:
@@ -178,29 +182,24 @@ def article(keyword, tone, article_type, model):
 @click.option('--types', '-y', multiple=True, 
               type=click.Choice(['primary_keywords', 'long_tail_keywords', 'question_keywords', 'local_keywords', 'related_keywords']),
               help='Types of keywords to generate (can specify multiple)')
-def keywords(topic, count, types):
+@click.option('--no-cache', is_flag=True, help='Ignore cached results and call the OpenAI API')
+def keywords(topic, count, types, no_cache):
     """Generate SEO keywords for a given topic using chat"""
-    if not os.getenv("OPENAI_API_KEY"):
-        click.echo("❌ Error: OPENAI_API_KEY not found in environment variables.")
-        click.echo("Please create a .env file with your OpenAI API key:")
-        click.echo("OPENAI_API_KEY=your_api_key_here")
+    if not _has_api_key():
         return
-    output_dir = os.path.expanduser('~/SEO articles')
-    os.makedirs(output_dir, exist_ok=True)
-    click.echo(f"\n🔍 Generating SEO keywords...")
-    click.echo(f"Topic: {topic}")
-    click.echo(f"Keyword count: {count}")
-    if types:
-        click.echo(f"Keyword types: {', '.join(types)}")
-    else:
-        click.echo("Keyword types: All types")
-    click.echo("-" * 50)
+    click.echo("\n".join([
+        f"\n🔍 Generating SEO keywords...",
+        f"Topic: {topic}",
+        f"Keyword count: {count}",
+        f"Keyword types: {', '.join(types) if types else 'All types'}",
+        "-" * 50
+    ]))
     try:
         keyword_types = list(types) if types else None
-        keywords_data = generate_keywords_with_tools(topic, count, keyword_types)
+        keywords_data = generate_keywords_with_tools(topic, count, keyword_types, use_cache=not no_cache)
         if keywords_data:
             display_keywords(keywords_data)
-            filepath = save_keywords_to_file(keywords_data, topic, output_dir)
+            filepath = save_keywords_to_file(keywords_data, topic)
             click.echo(f"\n✅ Keywords saved to: {filepath}")
             total_keywords = sum(len(keyword_list) for keyword_list in keywords_data.get('keywords', {}).values())
             click.echo(f"📊 Total keywords generated: {total_keywords}")
@@ -210,6 +209,87 @@ def keywords(topic, count, types):
         click.echo(f"❌ Error: {str(e)}")
         click.echo("Please check your OpenAI API key and internet connection.")
 
+@cli.command()
+@click.option('--topic', '-t', 'topics', multiple=True, required=True, help='Topic to generate keywords and an article for (can specify multiple)')
+@click.option('--tone', default='informal', type=click.Choice(TONES), help='Tone of the articles')
+@click.option('--article-type', '-a', default='guide', type=click.Choice(ARTICLE_TYPES), help='Type of articles to generate')
+@click.option('--model', '-m', default=DEFAULT_MODEL, type=click.Choice(MODELS), help='OpenAI model to use')
+@click.option('--archive', is_flag=True, help='Collect all output in one run-<timestamp>.jsonl file instead of three files per topic')
+@click.option('--compress', is_flag=True, help='Gzip-compress the run archive (implies --archive)')
+@click.option('--no-cache', is_flag=True, help='Ignore cached results and call the OpenAI API')
+def batch(topics, tone, article_type, model, archive, compress, no_cache):
+    """Generate keywords and articles for several topics concurrently"""
+    if not _has_api_key():
+        return
+    click.echo("\n".join([
+        f"\n🚀 Generating {len(topics)} SEO articles concurrently...",
+        f"Topics: {', '.join(topics)}",
+        f"Tone: {tone}",
+        f"Article type: {article_type}",
+        f"Model: {model}",
+        "-" * 50
+    ]))
+    archive_path = run_archive_path(compress=compress) if archive or compress else None
+    results = asyncio.run(agenerate_and_save_many(
+        list(topics), tone, article_type, model, use_cache=not no_cache, archive_path=archive_path
+    ))
+    for topic, result in zip(topics, results):
+        if isinstance(result, Exception):
+            click.echo(f"❌ {topic}: {str(result)}")
+        elif not result:
+            click.echo(f"❌ {topic}: Failed to generate article.")
+        elif archive_path:
+            click.echo(f"✅ {topic}")
+        else:
+            json_path, md_path, keywords_path = result
+            click.echo(f"\n✅ {topic}")
+            click.echo(f"   📄 Article JSON: {json_path}")
+            click.echo(f"   📝 Article Markdown: {md_path}")
+            click.echo(f"   🔍 Keywords JSON: {keywords_path}")
+    if archive_path:
+        click.echo(f"\n📦 Run archive: {archive_path}")
+
+@cli.command('article-batch')
+@click.option('--topics-file', '-f', required=True, type=click.File('r', encoding='utf-8'), help='Text file with one topic per line')
+@click.option('--tone', '-t', default='informal', type=click.Choice(TONES), help='Tone of the articles')
+@click.option('--article-type', '-a', default='guide', type=click.Choice(ARTICLE_TYPES), help='Type of articles to generate')
+@click.option('--model', '-m', default=DEFAULT_MODEL, type=click.Choice(MODELS), help='OpenAI model to use')
+@click.option('--batch-id', help='Resume waiting on a previously submitted batch for the same topics file')
+def article_batch(topics_file, tone, article_type, model, batch_id):
+    """Generate articles for many topics through the OpenAI Batch API (50% cheaper, results within 24h)"""
+    if not _has_api_key():
+        return
+    topics = [line.strip() for line in topics_file if line.strip()]
+    if not topics:
+        click.echo("❌ No topics found in the topics file.")
+        return
+    try:
+        if not batch_id:
+            batch_id = submit_article_batch(topics, tone, article_type, model)
+            click.echo(f"\n📦 Submitted batch {batch_id} with {len(topics)} articles")
+            click.echo(f"Resume later with: --batch-id {batch_id}")
+        click.echo("⏳ Waiting for batch to complete...")
+        batch = wait_for_batch(batch_id, on_status=lambda b: click.echo(f"   Status: {b.status}"))
+        if batch.status != "completed":
+            click.echo(f"❌ Batch ended with status: {batch.status}")
+            return
+        results = collect_article_batch(batch, topics, tone, article_type, model)
+        for topic, data in zip(topics, results):
+            if data:
+                json_path, md_path = save_article(data, topic)
+                click.echo(f"✅ {topic}: {md_path}")
+            else:
+                click.echo(f"❌ {topic}: Failed to generate article.")
+    except Exception as e:
+        click.echo(f"❌ Error: {str(e)}")
+        click.echo("Please check your OpenAI API key and internet connection.")
+
+@cli.command('clear-cache')
+def clear_cache_command():
+    """Delete all cached keyword and article responses"""
+    clear_cache()
+    click.echo(f"🧹 Cleared response cache: {CACHE_DIR}")
+
 def main():
     interactive_main()
 
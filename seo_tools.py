@@ -4,264 +4,1001 @@ Core SEO tools: keyword generation, article generation, file saving, and prompt
 """
 
 import os
+import re
+import pathlib
+import sys
+import gzip
+import hashlib
+import shutil
+import functools
+import collections
+import itertools
 import json
-import openai
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import orjson
 from dotenv import load_dotenv
+from types import MappingProxyType
 from typing import List, Dict, Any, Optional
 
 load_dotenv()
 
-# --- Article Generation ---
+# Read once at import; the clients and every generate_* guard share this value
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+# Same layout as json.dump(indent=2, ensure_ascii=False), encoded in C straight to UTF-8 bytes
+JSON_FILE_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+# Every output file lands here; resolved once at import instead of on each save/command
+OUTPUT_DIR = pathlib.Path("~/SEO articles").expanduser()
+
+_ensured_dirs = set()
+
+def ensure_dir(path):
+    """Create path if needed, skipping the makedirs syscalls for directories already ensured."""
+    if path not in _ensured_dirs:
+        os.makedirs(path, exist_ok=True)
+        _ensured_dirs.add(path)
 
+# --- Response Cache ---
+# Generated keywords/articles are cached on disk so re-running the same inputs skips the API call.
+# Results are keyed by the full request (model, messages and tool schema), so editing a prompt or
+# schema invalidates old entries on its own; bump CACHE_VERSION only if the stored format changes.
+CACHE_DIR = OUTPUT_DIR / '.cache'
+CACHE_VERSION = 3
 
+def _cache_key(kind, *parts):
+    return hashlib.sha256(orjson.dumps([CACHE_VERSION, kind, *parts])).hexdigest()
 
-def generate_article_with_tools(keyword, tone="informal", article_type="guide", model=None, keywords_list=None):
+cache_stats = collections.Counter()
+
+# Recently used entries are also kept in memory, so repeats within one process skip the disk.
+# Raw bytes are stored so every hit decodes a fresh object that callers are free to mutate.
+MEMORY_CACHE_SIZE = 512
+_memory_cache = collections.OrderedDict()
+
+def _memory_put(kind, key, payload):
+    _memory_cache[(kind, key)] = payload
+    _memory_cache.move_to_end((kind, key))
+    if len(_memory_cache) > MEMORY_CACHE_SIZE:
+        _memory_cache.popitem(last=False)
+
+def cache_get(kind, key):
+    """Return the cached result for key, or None on a miss."""
+    payload = _memory_cache.get((kind, key))
+    if payload is not None:
+        _memory_cache.move_to_end((kind, key))
+        cache_stats["hits"] += 1
+        return orjson.loads(payload)
+    try:
+        payload = (CACHE_DIR / kind / f"{key}.json").read_bytes()
+        value = orjson.loads(payload)
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        cache_stats["misses"] += 1
+        return None
+    cache_stats["hits"] += 1
+    _memory_put(kind, key, payload)
+    return value
+
+def cache_put(kind, key, value):
+    payload = orjson.dumps(value)
+    cache_dir = CACHE_DIR / kind
+    ensure_dir(cache_dir)
+    _write_file(cache_dir / f"{key}.json", payload)
+    _memory_put(kind, key, payload)
+
+def clear_cache():
+    """Delete every cached response and semantic index entry, and reset the hit/miss counters."""
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
+    _memory_cache.clear()
+    # ensure_dir must recreate the cache directories on the next write
+    _ensured_dirs.clear()
+    semantic_index.cache_clear()
+    cache_stats.clear()
+
+# --- Semantic Cache ---
+# Opt-in second tier behind the exact cache: with a similarity_threshold, a miss embeds the
+# topic and reuses the result of the closest earlier topic generated with the same settings.
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+def _env_threshold(name):
+    """Parse a cosine-similarity threshold from the environment; unset or invalid disables the tier."""
+    value = os.getenv(name, "").strip()
+    if not value:
+        return None
+    try:
+        threshold = float(value)
+    except ValueError:
+        threshold = None
+    if threshold is None or not 0 < threshold <= 1:
+        print(f"⚠️ Ignoring {name}={value!r}: expected a number in (0, 1]; semantic cache disabled")
+        return None
+    return threshold
+
+# Setting SEMANTIC_CACHE_THRESHOLD (e.g. 0.92) turns the tier on for every call, CLI runs included,
+# that doesn't pass its own similarity_threshold
+SEMANTIC_CACHE_THRESHOLD = _env_threshold("SEMANTIC_CACHE_THRESHOLD")
+
+@functools.cache
+def semantic_index(kind):
+    """Return the SemanticIndex for kind; semantic_cache (and numpy) load only once the tier is used."""
+    from semantic_cache import SemanticIndex
+    return SemanticIndex(CACHE_DIR / "semantic" / f"{kind}.jsonl")
+
+def _semantic_scope(kind, request, *parts):
     """
-    Generate an SEO article using OpenAI Responses API with function calling.
-    This is a more reliable approach than the build_prompt method.
+    Hash everything in request except its user message (model, system prompt, tools, tool_choice)
+    together with parts, so editing a prompt or schema starts a fresh scope just as it does a fresh cache key.
     """
-    if not os.getenv("OPENAI_API_KEY"):
-        raise ValueError("OpenAI API key not found. Please set OPENAI_API_KEY in your .env file.")
-    
-    # Use gpt-4.1 as default for Responses API
-    model = model or "gpt-4.1"
-    
-    # Define the tool schema for Responses API
-    tools = [{
-        "type": "function",
-        "name": "generate_seo_article",
-        "description": "Generate a comprehensive SEO-optimized article with all required components",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "meta_title": {"type": "string", "description": "SEO-optimized title (50-60 characters)"},
-                "meta_description": {"type": "string", "description": "Compelling description (150-160 characters)"},
-                "article_title": {"type": "string", "description": "Engaging main title"},
-                "target_keyword": {"type": "string", "description": "The target keyword for this article"},
-                "word_count": {"type": "integer", "description": "Target word count for the article"},
-                "article_sections": {
-                    "type": "array",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "heading": {"type": "string", "description": "H2 heading for the section"},
-                            "content": {"type": "string", "description": "Well-written content with natural keyword usage"}
-                        },
-                        "required": ["heading", "content"],
-                        "additionalProperties": False
+    static = {k: v for k, v in request.items() if k != "input"}
+    system = [message for message in request["input"] if message["role"] != "user"]
+    return _cache_key(kind, EMBEDDING_MODEL, static, system, *parts)
+
+def _semantic_text(text):
+    return " ".join(text.lower().split())
+
+def _semantic_hit(kind, scope, vector, threshold):
+    key = semantic_index(kind).search(scope, vector, threshold)
+    return cache_get(kind, key) if key else None
+
+def _semantic_lookup(kind, scope, text, threshold):
+    """
+    Embed text and look it up in the semantic index.
+    Returns (cached result or None, vector); vector is None when embedding failed.
+    """
+    try:
+        response = get_client().embeddings.create(model=EMBEDDING_MODEL, input=_semantic_text(text))
+    except Exception as e:
+        print(f"⚠️ Semantic cache skipped: {e}")
+        return None, None
+    vector = response.data[0].embedding
+    return _semantic_hit(kind, scope, vector, threshold), vector
+
+async def _asemantic_lookup(kind, scope, text, threshold):
+    try:
+        response = await request_limiter.call(get_async_client().embeddings.create, model=EMBEDDING_MODEL, input=_semantic_text(text))
+    except Exception as e:
+        print(f"⚠️ Semantic cache skipped: {e}")
+        return None, None
+    vector = response.data[0].embedding
+    return _semantic_hit(kind, scope, vector, threshold), vector
+
+# Long keyword lists are cut down to the ones closest in meaning to the article keyword,
+# so prompt size stays bounded no matter how many keywords an upstream step produced.
+MAX_PROMPT_KEYWORDS = 30
+
+def _top_keywords(response, keywords_list, max_k):
+    # OpenAI embeddings are unit length, so the dot product is the cosine similarity
+    target, *vectors = (item.embedding for item in response.data)
+    scores = [sum(a * b for a, b in zip(target, vector)) for vector in vectors]
+    keep = set(sorted(range(len(scores)), key=scores.__getitem__, reverse=True)[:max_k])
+    # Keep the survivors in their original order so the prompt reads the same way
+    return [kw for i, kw in enumerate(keywords_list) if i in keep]
+
+def _prune_keywords(target, keywords_list, max_k=MAX_PROMPT_KEYWORDS):
+    """Return keywords_list unchanged if it fits, else its max_k keywords most similar to target."""
+    if not keywords_list or len(keywords_list) <= max_k:
+        return keywords_list
+    try:
+        response = get_client().embeddings.create(model=EMBEDDING_MODEL, input=[target, *keywords_list])
+    except Exception as e:
+        print(f"⚠️ Keyword ranking failed, using the first {max_k} keywords: {e}")
+        return keywords_list[:max_k]
+    return _top_keywords(response, keywords_list, max_k)
+
+async def _aprune_keywords(target, keywords_list, max_k=MAX_PROMPT_KEYWORDS):
+    if not keywords_list or len(keywords_list) <= max_k:
+        return keywords_list
+    try:
+        response = await request_limiter.call(get_async_client().embeddings.create, model=EMBEDDING_MODEL, input=[target, *keywords_list])
+    except Exception as e:
+        print(f"⚠️ Keyword ranking failed, using the first {max_k} keywords: {e}")
+        return keywords_list[:max_k]
+    return _top_keywords(response, keywords_list, max_k)
+
+# --- Shared Prompt Prefix ---
+# Opens the system message of every keyword and article request. It and the per-kind system
+# prompts built on it must stay byte-identical (no topic, tone or other per-call values)
+# so OpenAI's automatic prompt caching can reuse them.
+SYSTEM_PROMPT = """
+You are an expert SEO strategist and content writer.
+
+General rules:
+- Write for human readers first and search engines second
+- Only use information that is accurate and widely accepted
+- Use natural, fluent English and avoid keyword stuffing
+- Prefer specific, practical wording over vague filler
+- Always answer by calling the provided function with every required field filled in
+"""
+
+# --- Article Generation ---
+
+
+
+# Small models handle this structured-output task at a fraction of the latency and cost;
+# a truncated, invalid or incomplete article from the default model is retried once on FALLBACK_MODEL.
+# The check compares against DEFAULT_MODEL, so this also applies when the caller names it explicitly.
+DEFAULT_MODEL = os.getenv("OPENAI_MODEL", "gpt-4.1-mini")
+FALLBACK_MODEL = "gpt-4.1"
+# Keyword lists are an even lighter task; a result without primary keywords gets the same one-shot fallback
+KEYWORDS_MODEL = os.getenv("OPENAI_KEYWORDS_MODEL", "gpt-4.1-mini")
+
+# Tool schema for the Responses API, built once at import and shared by every request
+_ARTICLE_TOOLS = [{
+    "type": "function",
+    "name": "generate_seo_article",
+    "description": "Generate a comprehensive SEO-optimized article with all required components",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "meta_title": {"type": "string", "description": "SEO-optimized title (50-60 characters)"},
+            "meta_description": {"type": "string", "description": "Compelling description (150-160 characters)"},
+            "article_title": {"type": "string", "description": "Engaging main title"},
+            "target_keyword": {"type": "string", "description": "The target keyword for this article"},
+            "word_count": {"type": "integer", "description": "Target word count for the article"},
+            "article_sections": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "heading": {"type": "string", "description": "H2 heading for the section"},
+                        "content": {"type": "string", "description": "Well-written content with natural keyword usage"}
                     },
-                    "description": "Article sections with headings and content"
+                    "required": ["heading", "content"],
+                    "additionalProperties": False
                 },
-                "faq": {
-                    "type": "array",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "question": {"type": "string", "description": "Common question about the topic"},
-                            "answer": {"type": "string", "description": "Clear, helpful answer"}
-                        },
-                        "required": ["question", "answer"],
-                        "additionalProperties": False
+                "description": "Article sections with headings and content"
+            },
+            "faq": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "question": {"type": "string", "description": "Common question about the topic"},
+                        "answer": {"type": "string", "description": "Clear, helpful answer"}
                     },
-                    "description": "Frequently asked questions and answers"
+                    "required": ["question", "answer"],
+                    "additionalProperties": False
                 },
-                "seo_tips": {
-                    "type": "array",
-                    "items": {"type": "string", "description": "SEO optimization tip"},
-                    "description": "List of SEO optimization tips"
-                }
+                "description": "Frequently asked questions and answers"
             },
-            "required": ["meta_title", "meta_description", "article_title", "target_keyword", "word_count", "article_sections", "faq", "seo_tips"],
-            "additionalProperties": False
+            "seo_tips": {
+                "type": "array",
+                "items": {"type": "string", "description": "SEO optimization tip"},
+                "description": "List of SEO optimization tips"
+            }
         },
-        "strict": True
-    }]
-    
-    # Build the prompt without JSON examples
-    keywords_section = ""
-    if keywords_list:
-        keywords_str = ", ".join(f'"{kw}"' for kw in keywords_list)
-        keywords_section = f"""
-- Use ALL of the following keywords naturally throughout the article: {keywords_str}
-"""
-    
-    prompt = f"""
-Generate a comprehensive SEO-optimized article about "{keyword}".
-
-Article Requirements:
-- Tone: {tone}
-- Article type: {article_type}
-{keywords_section}
-
-The article must include:
-1. SEO-optimized meta title (50-60 characters)
-2. Compelling meta description (150-160 characters)
-3. Engaging article title
-4. Well-structured content with H2 headings
-5. Natural keyword usage throughout
-6. FAQ section with relevant questions
-7. SEO optimization tips
-
-Make sure the content is:
-- Comprehensive and detailed
-- Well-researched and accurate
-- Engaging and readable
-- Optimized for search engines
+        "required": ["meta_title", "meta_description", "article_title", "target_keyword", "word_count", "article_sections", "faq", "seo_tips"],
+        "additionalProperties": False
+    },
+    "strict": True
+}]
+
+# Everything that does not depend on the request goes in the system message, after SYSTEM_PROMPT;
+# the user message only lists the per-call fields, so they sit at the very end of the prompt.
+_ARTICLE_SYSTEM_PROMPT = SYSTEM_PROMPT + """
+Article task:
+Generate a comprehensive SEO-optimized article for the keyword, tone and article type given by the user.
+- If the user lists keywords, use ALL of them naturally throughout the article
+- Fill in every field of generate_seo_article, following the limits in its field descriptions
+- Use H2-level section headings, and make the content comprehensive, accurate, engaging and optimized for search engines
 """
 
+def build_prompt_minimal(keyword, tone, article_type, keywords_list=None):
+    """
+    The per-call fields of an article request. The instructions live in _ARTICLE_SYSTEM_PROMPT
+    and the output structure in the _ARTICLE_TOOLS schema, so no JSON example is sent.
+    """
+    lines = [f'Keyword: "{keyword}"', f"Tone: {tone}", f"Article type: {article_type}"]
+    if keywords_list:
+        lines.append("Keywords to use: " + ", ".join(f'"{kw}"' for kw in keywords_list))
+    return "\n".join(lines)
+
+def _article_request(keyword, tone, article_type, model, keywords_list):
+    """Build the Responses API request for article generation."""
+    return {
+        "model": model or DEFAULT_MODEL,
+        "input": [
+            {"role": "system", "content": _ARTICLE_SYSTEM_PROMPT},
+            {"role": "user", "content": build_prompt_minimal(keyword, tone, article_type, keywords_list)}
+        ],
+        "tools": _ARTICLE_TOOLS,
+        # Forcing the call means the model can't spend a full generation on a plain-text reply we would discard
+        "tool_choice": {"type": "function", "name": "generate_seo_article"}
+    }
+
+def _parse_article_item(item):
+    if item.type == "function_call" and item.name == "generate_seo_article":
+        # A call cut off by the output limit comes back incomplete, usually with unterminated JSON
+        if getattr(item, "status", None) == "incomplete":
+            print("⚠️ Warning: Article tool call was truncated")
+            return None
+        try:
+            data = orjson.loads(item.arguments)
+        except orjson.JSONDecodeError as e:
+            print(f"⚠️ Warning: Article tool call returned invalid JSON: {e}")
+            return None
+        required_fields = ['article_title', 'article_sections']
+        missing_fields = [field for field in required_fields if field not in data]
+        if missing_fields:
+            print(f"⚠️ Warning: Missing required fields: {missing_fields}")
+            return None
+        
+        # Return the generated article data
+        
+        return data
+    else:
+        print("⚠️ No function call response received")
+        return None
+
+def _parse_article_response(response):
+    if getattr(response, "status", None) == "incomplete":
+        print("⚠️ Warning: Article response was incomplete")
+        return None
+    # Handle function calls from Responses API
+    if response.output and len(response.output) > 0:
+        return _parse_article_item(response.output[0])
+    else:
+        print("⚠️ No tool calls in response")
+        return None
+
+_SECTIONS_START_RE = re.compile(r'"article_sections"\s*:\s*\[')
+_JSON_DECODER = json.JSONDecoder()
+
+class SectionStream:
+    """
+    Incrementally pulls completed article_sections items out of streamed
+    tool-call arguments, so sections can be reported while the rest of the
+    article is still being generated.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self._pos = None
+        self._done = False
+
+    def feed(self, delta):
+        """Append an arguments delta and return any sections it completed."""
+        self.buffer += delta
+        sections = []
+        if self._done:
+            return sections
+        if self._pos is None:
+            match = _SECTIONS_START_RE.search(self.buffer)
+            if not match:
+                return sections
+            self._pos = match.end()
+        elif "}" not in delta:
+            # A section object can only have completed if its closing brace arrived
+            return sections
+        buffer = self.buffer
+        while True:
+            i = self._pos
+            while i < len(buffer) and buffer[i] in " \t\r\n,":
+                i += 1
+            if i >= len(buffer):
+                break
+            if buffer[i] == "]":
+                self._done = True
+                break
+            try:
+                section, end = _JSON_DECODER.raw_decode(buffer, i)
+            except json.JSONDecodeError:
+                break
+            sections.append(section)
+            self._pos = end
+        return sections
+
+def _stream_article(request, on_section=None):
+    """Stream the article tool call, reporting each section as soon as it is complete."""
+    sections = SectionStream()
+    stream = get_client().responses.create(**request, stream=True)  # type: ignore
+    try:
+        for event in stream:
+            if event.type == "response.function_call_arguments.delta":
+                for section in sections.feed(event.delta):
+                    if on_section:
+                        on_section(section)
+            elif event.type == "response.output_item.done":
+                return _parse_article_item(event.item)
+    finally:
+        stream.close()
+    print("⚠️ No tool calls in response")
+    return None
+
+async def _astream_article(request, on_section=None):
+    sections = SectionStream()
+    stream = await get_async_client().responses.create(**request, stream=True)  # type: ignore
+    try:
+        async for event in stream:
+            if event.type == "response.function_call_arguments.delta":
+                for section in sections.feed(event.delta):
+                    if on_section:
+                        on_section(section)
+            elif event.type == "response.output_item.done":
+                return _parse_article_item(event.item)
+    finally:
+        await stream.close()
+    print("⚠️ No tool calls in response")
+    return None
+
+def _should_fall_back(request, default_model=DEFAULT_MODEL):
+    return request["model"] == default_model != FALLBACK_MODEL
+
+def _fallback_request(request, result="article", streamed=False):
+    print(f"⚠️ {request['model']} returned an incomplete {result}, retrying with {FALLBACK_MODEL}")
+    if streamed:
+        # on_section already showed the rejected attempt; mark where the retry's sections begin
+        print(f"⚠️ Discard the sections above; the {result} restarts below\n" + "-" * 40)
+    return {**request, "model": FALLBACK_MODEL}
+
+def generate_article_with_tools(keyword, tone="informal", article_type="guide", model=None, keywords_list=None, use_cache=True, on_section=None, similarity_threshold=None):
+    """
+    Generate an SEO article using OpenAI Responses API with function calling.
+    This is a more reliable approach than the build_prompt method.
+    The response is streamed; on_section(section) is called as each article section completes.
+    If the default model's article is incomplete and the request falls back to FALLBACK_MODEL,
+    a separator is printed and on_section is called again for the retry's sections.
+    With similarity_threshold set, a cache miss also checks the semantic cache for a near-duplicate keyword.
+    """
+    if not OPENAI_API_KEY:
+        raise ValueError("OpenAI API key not found. Please set OPENAI_API_KEY in your .env file.")
+    
+    model = model or DEFAULT_MODEL
+    request = _article_request(keyword, tone, article_type, model, keywords_list)
+    key = _cache_key("article", request)
+    if use_cache:
+        cached = cache_get("article", key)
+        if cached is not None:
+            return cached
+    vector = None
+    if similarity_threshold is None:
+        similarity_threshold = SEMANTIC_CACHE_THRESHOLD
+    if use_cache and similarity_threshold is not None:
+        scope = _semantic_scope("article", request, tone, article_type, sorted(keywords_list or []))
+        cached, vector = _semantic_lookup("article", scope, keyword, similarity_threshold)
+        if cached is not None:
+            return cached
+    prompt_keywords = _prune_keywords(keyword, keywords_list)
+    if prompt_keywords is not keywords_list:
+        request = _article_request(keyword, tone, article_type, model, prompt_keywords)
     try:
         # Use Responses API
-        response = client.responses.create(
-            model=model,
-            input=[{"role": "user", "content": prompt}],
-            tools=tools  # type: ignore
-        )
-        
-        # Handle function calls from Responses API
-        if response.output and len(response.output) > 0:
-            tool_call = response.output[0]
-            if tool_call.type == "function_call" and tool_call.name == "generate_seo_article":
-                data = json.loads(tool_call.arguments)
-                required_fields = ['article_title', 'article_sections']
-                missing_fields = [field for field in required_fields if field not in data]
-                if missing_fields:
-                    print(f"⚠️ Warning: Missing required fields: {missing_fields}")
-                    return None
-                
-                # Return the generated article data
-                
-                return data
-            else:
-                print("⚠️ No function call response received")
-                return None
-        else:
-            print("⚠️ No tool calls in response")
-            return None
-                
+        data = _stream_article(request, on_section)
+        if data is None and _should_fall_back(request):
+            data = _stream_article(_fallback_request(request, streamed=on_section is not None), on_section)
     except Exception as e:
         print(f"❌ Error: {e}")
         return None
+
+    if use_cache and data is not None:
+        cache_put("article", key, data)
+        if vector is not None:
+            semantic_index("article").add(scope, vector, key)
+    return data
+
+async def agenerate_article_with_tools(keyword, tone="informal", article_type="guide", model=None, keywords_list=None, use_cache=True, on_section=None, similarity_threshold=None):
+    """
+    Async variant of generate_article_with_tools using the shared AsyncOpenAI client.
+    """
+    if not OPENAI_API_KEY:
+        raise ValueError("OpenAI API key not found. Please set OPENAI_API_KEY in your .env file.")
     
-    return None
+    model = model or DEFAULT_MODEL
+    request = _article_request(keyword, tone, article_type, model, keywords_list)
+    key = _cache_key("article", request)
+    if use_cache:
+        cached = cache_get("article", key)
+        if cached is not None:
+            return cached
+    vector = None
+    if similarity_threshold is None:
+        similarity_threshold = SEMANTIC_CACHE_THRESHOLD
+    if use_cache and similarity_threshold is not None:
+        scope = _semantic_scope("article", request, tone, article_type, sorted(keywords_list or []))
+        cached, vector = await _asemantic_lookup("article", scope, keyword, similarity_threshold)
+        if cached is not None:
+            return cached
+    prompt_keywords = await _aprune_keywords(keyword, keywords_list)
+    if prompt_keywords is not keywords_list:
+        request = _article_request(keyword, tone, article_type, model, prompt_keywords)
+    try:
+        data = await request_limiter.call(_astream_article, request, on_section)
+        if data is None and _should_fall_back(request):
+            data = await request_limiter.call(_astream_article, _fallback_request(request, streamed=on_section is not None), on_section)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return None
+
+    if use_cache and data is not None:
+        cache_put("article", key, data)
+        if vector is not None:
+            semantic_index("article").add(scope, vector, key)
+    return data
+
+async def agenerate_articles_many(items):
+    """
+    Generate several articles concurrently. Each item is a dict of keyword arguments
+    for agenerate_article_with_tools (at least "keyword"); request_limiter bounds how
+    many run at once. Results come back in order, with exceptions in place of failures.
+    """
+    return await asyncio.gather(
+        *(agenerate_article_with_tools(**item) for item in items),
+        return_exceptions=True
+    )
+
+def generate_articles_many(items):
+    """
+    Blocking wrapper around agenerate_articles_many for synchronous callers.
+    """
+    return asyncio.run(agenerate_articles_many(items))
 
 # --- Keyword Generation ---
-client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Long articles can take minutes to generate, so only the connect phase is kept short
+_READ_TIMEOUT = 600.0
+_CONNECT_TIMEOUT = 5.0
+# httpx drops idle connections after 5s by default; keep them long enough to span the pause
+# between interactive prompts or the keyword -> article hand-off without a new TLS handshake
+_KEEPALIVE_EXPIRY = 60.0
+
+# The OpenAI SDK (with httpx and pydantic) is only imported when the first client is requested,
+# so helpers like build_keyword_prompt, display_keywords or the save functions import fast.
+# One long-lived client per mode: keep-alive skips the TLS handshake on every call after the first,
+# and HTTP/2 lets concurrent requests share a socket instead of opening one each.
+@functools.cache
+def get_client():
+    """Return the shared sync OpenAI client, creating it on first use."""
+    import httpx
+    import openai
+    return openai.OpenAI(
+        api_key=OPENAI_API_KEY,
+        http_client=openai.DefaultHttpxClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=_KEEPALIVE_EXPIRY),
+            timeout=httpx.Timeout(_READ_TIMEOUT, connect=_CONNECT_TIMEOUT)
+        )
+    )
 
-def generate_keywords_with_tools(topic, keyword_count=15, keyword_types=None):
+# (event loop, client): the async connection pool and its locks belong to the loop that created them
+_async_client = (None, None)
+
+def get_async_client():
     """
-    Generate keywords using OpenAI Responses API with function calling.
-    This is a more reliable approach than the original generate_keywords method.
+    Return the AsyncOpenAI client for the running event loop, creating it on first use.
+    Each asyncio.run() (e.g. every generate_*_many call) gets a fresh client, so kept-alive
+    connections from an earlier, now closed loop are never reused.
     """
-    if not os.getenv("OPENAI_API_KEY"):
-        raise ValueError("OPENAI_API_KEY not found in environment variables")
-    
-    if keyword_types is None:
-        keyword_types = [
-            "primary_keywords",
-            "long_tail_keywords", 
-            "question_keywords",
-            "local_keywords",
-            "related_keywords"
-        ]
-    
-    # Define the tool schema for Responses API
-    tools = [{
-        "type": "function",
-        "name": "generate_seo_keywords",
-        "description": "Generate SEO keywords for content optimization",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "topic": {"type": "string", "description": "The main topic for keyword generation"},
-                "total_keywords": {"type": "integer", "description": "Total number of keywords generated"},
-                "keywords": {
-                    "type": "object",
-                    "properties": {
-                        "primary_keywords": {"type": "array", "items": {"type": "string"}},
-                        "long_tail_keywords": {"type": "array", "items": {"type": "string"}},
-                        "question_keywords": {"type": "array", "items": {"type": "string"}},
-                        "local_keywords": {"type": "array", "items": {"type": "string"}},
-                        "related_keywords": {"type": "array", "items": {"type": "string"}}
-                    },
-                    "required": ["primary_keywords", "long_tail_keywords", "question_keywords", "local_keywords", "related_keywords"],
-                    "description": "Keywords organized by type",
-                    "additionalProperties": False
+    global _async_client
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    bound_loop, client = _async_client
+    if client is None or bound_loop is not loop:
+        client = _new_async_client()
+        _async_client = (loop, client)
+    return client
+
+def _new_async_client():
+    import httpx
+    import openai
+    # The SDK retries 429s, 5xx and connection errors with exponential backoff and jitter.
+    return openai.AsyncOpenAI(
+        api_key=OPENAI_API_KEY,
+        max_retries=5,
+        http_client=openai.DefaultAsyncHttpxClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=_KEEPALIVE_EXPIRY),
+            timeout=httpx.Timeout(_READ_TIMEOUT, connect=_CONNECT_TIMEOUT)
+        )
+    )
+
+def __getattr__(name):
+    # Keeps `from seo_tools import client` working now that the clients are created lazily
+    if name == "client":
+        return get_client()
+    if name == "async_client":
+        return get_async_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+class RequestLimiter:
+    """
+    Bounds concurrent async OpenAI requests and spaces out request starts
+    so batch runs stay under a requests-per-minute quota.
+    """
+
+    def __init__(self, max_concurrent=8, max_requests_per_minute=500):
+        self.max_concurrent = max_concurrent
+        self.interval = 60.0 / max_requests_per_minute
+        self._loop = None
+        self._semaphore = None
+        self._lock = None
+        self._next_slot = 0.0
+
+    def _bind(self):
+        # asyncio primitives belong to one event loop; rebuild them for each asyncio.run()
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+            self._lock = asyncio.Lock()
+            self._next_slot = 0.0
+
+    async def call(self, func, *args, **kwargs):
+        self._bind()
+        async with self._semaphore:
+            async with self._lock:
+                now = self._loop.time()
+                wait = self._next_slot - now
+                self._next_slot = max(now, self._next_slot) + self.interval
+            if wait > 0:
+                await asyncio.sleep(wait)
+            return await func(*args, **kwargs)
+
+request_limiter = RequestLimiter()
+
+_KEYWORD_TYPE_DESCRIPTIONS = MappingProxyType({
+    "primary_keywords": "main target keywords (1-3 words)",
+    "long_tail_keywords": "longer, more specific phrases (4+ words)",
+    "question_keywords": "keywords that start with what, how, why, when, where, etc.",
+    "local_keywords": "keywords with location modifiers",
+    "related_keywords": "semantically related terms and synonyms"
+})
+
+# Each type's prompt line is formatted once, so rendering a selection is just lookups and a join
+_TYPES_FRAGMENT = MappingProxyType({
+    keyword_type: f"- {keyword_type}: {description}\n"
+    for keyword_type, description in _KEYWORD_TYPE_DESCRIPTIONS.items()
+})
+_DEFAULT_KEYWORD_TYPES = tuple(_KEYWORD_TYPE_DESCRIPTIONS)
+_DEFAULT_TYPES_SECTION = "".join(_TYPES_FRAGMENT.values())
+
+@functools.lru_cache(maxsize=128)
+def _render_keyword_types(keyword_types):
+    """Render the bullet list describing the requested keyword types (a tuple, so it can be cached)."""
+    if keyword_types == _DEFAULT_KEYWORD_TYPES:
+        return _DEFAULT_TYPES_SECTION
+    return "".join(_TYPES_FRAGMENT[k] for k in keyword_types if k in _TYPES_FRAGMENT)
+
+# Tool schema for the Responses API, built once at import and shared by every request
+_KEYWORDS_TOOLS = [{
+    "type": "function",
+    "name": "generate_seo_keywords",
+    "description": "Generate SEO keywords for content optimization",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "topic": {"type": "string", "description": "The main topic for keyword generation"},
+            "total_keywords": {"type": "integer", "description": "Total number of keywords generated"},
+            "keywords": {
+                "type": "object",
+                "properties": {
+                    "primary_keywords": {"type": "array", "items": {"type": "string"}},
+                    "long_tail_keywords": {"type": "array", "items": {"type": "string"}},
+                    "question_keywords": {"type": "array", "items": {"type": "string"}},
+                    "local_keywords": {"type": "array", "items": {"type": "string"}},
+                    "related_keywords": {"type": "array", "items": {"type": "string"}}
                 },
-                "seo_insights": {
-                    "type": "object",
-                    "properties": {
-                        "search_volume_estimate": {"type": "string", "description": "Estimated search volume (high/medium/low)"},
-                        "competition_level": {"type": "string", "description": "Competition level (high/medium/low)"},
-                        "recommended_focus": {"type": "string", "description": "Recommended keywords to focus on"}
-                    },
-                    "required": ["search_volume_estimate", "competition_level", "recommended_focus"],
-                    "description": "SEO insights and recommendations",
-                    "additionalProperties": False
-                }
+                "required": ["primary_keywords", "long_tail_keywords", "question_keywords", "local_keywords", "related_keywords"],
+                "description": "Keywords organized by type",
+                "additionalProperties": False
             },
-            "required": ["topic", "total_keywords", "keywords", "seo_insights"],
-            "additionalProperties": False
+            "seo_insights": {
+                "type": "object",
+                "properties": {
+                    "search_volume_estimate": {"type": "string", "description": "Estimated search volume (high/medium/low)"},
+                    "competition_level": {"type": "string", "description": "Competition level (high/medium/low)"},
+                    "recommended_focus": {"type": "string", "description": "Recommended keywords to focus on"}
+                },
+                "required": ["search_volume_estimate", "competition_level", "recommended_focus"],
+                "description": "SEO insights and recommendations",
+                "additionalProperties": False
+            }
         },
-        "strict": True
-    }]
-    
-    # Build the prompt without JSON examples
-    keyword_type_descriptions = {
-        "primary_keywords": "main target keywords (1-3 words)",
-        "long_tail_keywords": "longer, more specific phrases (4+ words)",
-        "question_keywords": "keywords that start with what, how, why, when, where, etc.",
-        "local_keywords": "keywords with location modifiers",
-        "related_keywords": "semantically related terms and synonyms"
-    }
-    
-    types_section = ""
-    for keyword_type in keyword_types:
-        if keyword_type in keyword_type_descriptions:
-            types_section += f"- {keyword_type}: {keyword_type_descriptions[keyword_type]}\n"
-    
-    prompt = f"""
-Generate SEO keywords for the topic: "{topic}"
+        "required": ["topic", "total_keywords", "keywords", "seo_insights"],
+        "additionalProperties": False
+    },
+    "strict": True
+}]
 
-Requirements:
-- Generate {keyword_count} keywords total
+_KEYWORDS_SYSTEM_PROMPT = SYSTEM_PROMPT + """
+Keyword task:
+Generate SEO keywords for the topic given by the user, with the total count and keyword types they ask for.
 - Focus on high-search-volume, low-competition keywords
-- Include a mix of different keyword types
-- Keywords should be relevant and valuable for SEO
+- Include a mix of the requested keyword types
+- Make sure all keywords are relevant to the topic, searchable and commonly used, optimized for SEO, and include the main topic naturally
+"""
 
-Keyword types to include:
-{types_section}
+def build_keyword_prompt_minimal(topic, keyword_count, keyword_types=None):
+    """
+    The per-call fields of a keyword request; unlike build_keyword_prompt it carries no
+    JSON example, since _KEYWORDS_SYSTEM_PROMPT and the _KEYWORDS_TOOLS schema cover the rest.
+    """
+    if keyword_types is None:
+        keyword_types = _DEFAULT_KEYWORD_TYPES
+    types_section = _render_keyword_types(tuple(keyword_types))
+    return f'Topic: "{topic}"\nKeyword count: {keyword_count}\nKeyword types to include:\n{types_section}'
 
-Make sure all keywords are:
-- Relevant to the topic
-- Searchable and commonly used
-- Optimized for SEO
-- Include the main topic naturally
-"""
+def _keywords_request(topic, keyword_count, keyword_types):
+    """Build the Responses API request for keyword generation."""
+    return {
+        "model": KEYWORDS_MODEL,
+        "input": [
+            {"role": "system", "content": _KEYWORDS_SYSTEM_PROMPT},
+            {"role": "user", "content": build_keyword_prompt_minimal(topic, keyword_count, keyword_types)}
+        ],
+        "tools": _KEYWORDS_TOOLS,
+        "tool_choice": {"type": "function", "name": "generate_seo_keywords"}
+    }
+
+def _parse_keywords_item(item):
+    if item.type == "function_call" and item.name == "generate_seo_keywords":
+        keywords_data = orjson.loads(item.arguments)
+        return keywords_data
+    else:
+        print("⚠️ No function call response received")
+        return None
+
+def _stream_keywords(request):
+    """Stream the keyword response and stop reading once the tool call is complete."""
+    stream = get_client().responses.create(**request, stream=True)  # type: ignore
+    try:
+        for event in stream:
+            if event.type == "response.output_item.done":
+                return _parse_keywords_item(event.item)
+    finally:
+        stream.close()
+    print("⚠️ No tool calls in response")
+    return None
+
+async def _astream_keywords(request):
+    stream = await get_async_client().responses.create(**request, stream=True)  # type: ignore
+    try:
+        async for event in stream:
+            if event.type == "response.output_item.done":
+                return _parse_keywords_item(event.item)
+    finally:
+        await stream.close()
+    print("⚠️ No tool calls in response")
+    return None
+
+def _needs_keywords_fallback(keywords_data, request, keyword_types=None):
+    """
+    True when the result looks incomplete: no primary keywords if they were requested,
+    otherwise none of the requested types filled in.
+    """
+    keywords = (keywords_data or {}).get('keywords', {})
+    if not keyword_types or "primary_keywords" in keyword_types:
+        complete = bool(keywords.get('primary_keywords'))
+    else:
+        complete = any(keywords.get(keyword_type) for keyword_type in keyword_types)
+    return not complete and _should_fall_back(request, KEYWORDS_MODEL)
+
+def generate_keywords_with_tools(topic, keyword_count=15, keyword_types=None, use_cache=True, similarity_threshold=None):
+    """
+    Generate keywords using OpenAI Responses API with function calling.
+    This is a more reliable approach than the original generate_keywords method.
+    With similarity_threshold set, a cache miss also checks the semantic cache for a near-duplicate topic.
+    """
+    if not OPENAI_API_KEY:
+        raise ValueError("OPENAI_API_KEY not found in environment variables")
     
+    request = _keywords_request(topic, keyword_count, keyword_types)
+    key = _cache_key("keywords", request)
+    if use_cache:
+        cached = cache_get("keywords", key)
+        if cached is not None:
+            return cached
+    vector = None
+    if similarity_threshold is None:
+        similarity_threshold = SEMANTIC_CACHE_THRESHOLD
+    if use_cache and similarity_threshold is not None:
+        scope = _semantic_scope("keywords", request, keyword_count, sorted(keyword_types or []))
+        cached, vector = _semantic_lookup("keywords", scope, topic, similarity_threshold)
+        if cached is not None:
+            return cached
     try:
         # Use Responses API
-        response = client.responses.create(
-            model="gpt-4.1",
-            input=[{"role": "user", "content": prompt}],
-            tools=tools  # type: ignore
-        )
-        
-        # Handle function calls from Responses API
-        if response.output and len(response.output) > 0:
-            tool_call = response.output[0]
-            if tool_call.type == "function_call" and tool_call.name == "generate_seo_keywords":
-                keywords_data = json.loads(tool_call.arguments)
-                return keywords_data
-            else:
-                print("⚠️ No function call response received")
-                return None
-        else:
-            print("⚠️ No tool calls in response")
-            return None
-            
+        keywords_data = _stream_keywords(request)
+        if _needs_keywords_fallback(keywords_data, request, keyword_types):
+            keywords_data = _stream_keywords(_fallback_request(request, "keyword set"))
     except Exception as e:
         raise Exception(f"Error generating keywords: {str(e)}")
 
+    if use_cache and keywords_data is not None:
+        cache_put("keywords", key, keywords_data)
+        if vector is not None:
+            semantic_index("keywords").add(scope, vector, key)
+    return keywords_data
+
+async def agenerate_keywords_with_tools(topic, keyword_count=15, keyword_types=None, use_cache=True, similarity_threshold=None):
+    """
+    Async variant of generate_keywords_with_tools using the shared AsyncOpenAI client.
+    """
+    if not OPENAI_API_KEY:
+        raise ValueError("OPENAI_API_KEY not found in environment variables")
+    
+    request = _keywords_request(topic, keyword_count, keyword_types)
+    key = _cache_key("keywords", request)
+    if use_cache:
+        cached = cache_get("keywords", key)
+        if cached is not None:
+            return cached
+    vector = None
+    if similarity_threshold is None:
+        similarity_threshold = SEMANTIC_CACHE_THRESHOLD
+    if use_cache and similarity_threshold is not None:
+        scope = _semantic_scope("keywords", request, keyword_count, sorted(keyword_types or []))
+        cached, vector = await _asemantic_lookup("keywords", scope, topic, similarity_threshold)
+        if cached is not None:
+            return cached
+    try:
+        keywords_data = await request_limiter.call(_astream_keywords, request)
+        if _needs_keywords_fallback(keywords_data, request, keyword_types):
+            keywords_data = await request_limiter.call(_astream_keywords, _fallback_request(request, "keyword set"))
+    except Exception as e:
+        raise Exception(f"Error generating keywords: {str(e)}")
+
+    if use_cache and keywords_data is not None:
+        cache_put("keywords", key, keywords_data)
+        if vector is not None:
+            semantic_index("keywords").add(scope, vector, key)
+    return keywords_data
+
+async def agenerate_keywords_many(topics, keyword_count=15, keyword_types=None):
+    """
+    Generate keywords for several topics concurrently.
+    Results come back in the same order as topics, with exceptions in place of failures.
+    """
+    return await asyncio.gather(
+        *(agenerate_keywords_with_tools(topic, keyword_count, keyword_types) for topic in topics),
+        return_exceptions=True
+    )
+
+def generate_keywords_many(topics, keyword_count=15, keyword_types=None):
+    """
+    Blocking wrapper around agenerate_keywords_many for synchronous callers.
+    """
+    return asyncio.run(agenerate_keywords_many(topics, keyword_count, keyword_types))
+
+# --- Pipelines ---
+def pick_article_keyword(keywords_data, topic):
+    """Return the first primary keyword, falling back to the original topic."""
+    primary_keywords = (keywords_data or {}).get('keywords', {}).get('primary_keywords', [])
+    return primary_keywords[0] if primary_keywords else topic
+
+async def agenerate_seo_content(topic, tone="informal", article_type="guide", model=None, use_cache=True, on_keywords=None, on_section=None):
+    """
+    Generate keywords for a topic, then an article targeting its top primary keyword.
+    Returns (keywords_data, article_data); article_data is None if either step fails.
+    on_keywords(keywords_data, article_keyword) and on_section(section) report progress as it happens.
+    """
+    keywords_data = await agenerate_keywords_with_tools(topic, 15, use_cache=use_cache)
+    if not keywords_data:
+        return keywords_data, None
+    article_keyword = pick_article_keyword(keywords_data, topic)
+    if on_keywords:
+        on_keywords(keywords_data, article_keyword)
+    data = await agenerate_article_with_tools(
+        article_keyword, tone, article_type, model=model, use_cache=use_cache, on_section=on_section
+    )
+    return keywords_data, data
+
+async def agenerate_article_with_keywords(keyword, tone="informal", article_type="guide", model=None, use_cache=True, on_section=None):
+    """
+    Generate keywords for a target keyword, then an article that works all of them in.
+    Returns the article data, or None if generation failed.
+    """
+    keywords_data = await agenerate_keywords_with_tools(keyword, 15, use_cache=use_cache)
+    flat_keywords = _flatten_keywords(keywords_data) if keywords_data else []
+    return await agenerate_article_with_tools(
+        keyword, tone, article_type, model=model, keywords_list=flat_keywords, use_cache=use_cache,
+        on_section=on_section
+    )
+
+async def agenerate_seo_content_many(topics, tone="informal", article_type="guide", model=None, use_cache=True):
+    """
+    Run the keyword -> article pipeline for several topics concurrently.
+    Each topic's two calls stay sequential, but calls for different topics overlap.
+    A failing topic yields its exception in place of the (keywords_data, article_data) tuple.
+    """
+    return await asyncio.gather(
+        *(agenerate_seo_content(topic, tone, article_type, model, use_cache) for topic in topics),
+        return_exceptions=True
+    )
+
+async def agenerate_and_save(topic, tone="informal", article_type="guide", model=None, use_cache=True, archive_path=None):
+    """
+    Run the keyword -> article pipeline for one topic and save the result as soon as it is ready.
+    Returns the saved file paths, or None if generation failed.
+    """
+    keywords_data, data = await agenerate_seo_content(topic, tone, article_type, model, use_cache)
+    if not data:
+        return None
+    if archive_path:
+        # A single small append; kept on the loop so concurrent topics never interleave lines
+        return (save_article_and_keywords_aggregated(data, keywords_data, topic, archive_path),)
+    return await asave_article_and_keywords(data, keywords_data, topic)
+
+async def agenerate_and_save_many(topics, tone="informal", article_type="guide", model=None, use_cache=True, archive_path=None):
+    """
+    Generate and save several topics concurrently; disk writes for finished topics
+    overlap with API calls still in flight for the others.
+    A failing topic yields its exception in place of its saved paths.
+    """
+    return await asyncio.gather(
+        *(agenerate_and_save(topic, tone, article_type, model, use_cache, archive_path) for topic in topics),
+        return_exceptions=True
+    )
+
+def generate_and_save_many(topics, tone="informal", article_type="guide", model=None, use_cache=True, archive_path=None):
+    """
+    Blocking wrapper around agenerate_and_save_many for synchronous callers, so a loop of
+    generate -> save calls can hand over the whole list and have the writes overlap the API calls.
+    """
+    return asyncio.run(agenerate_and_save_many(topics, tone, article_type, model, use_cache, archive_path))
+
+# --- Batch API ---
+# Non-interactive bulk runs can go through the OpenAI Batch API: half the price and a separate
+# rate-limit pool, in exchange for results arriving within a 24h window instead of immediately.
+BATCH_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+def submit_article_batch(topics, tone="informal", article_type="guide", model=None):
+    """
+    Upload one article request per topic to the Batch API.
+    Returns the batch id; custom ids are "article-<index>" into topics.
+    """
+    lines = [
+        orjson.dumps({
+            "custom_id": f"article-{i}",
+            "method": "POST",
+            "url": "/v1/responses",
+            "body": _article_request(topic, tone, article_type, model, None)
+        })
+        for i, topic in enumerate(topics)
+    ]
+    batch_file = get_client().files.create(file=("requests.jsonl", b"\n".join(lines) + b"\n"), purpose="batch")
+    batch = get_client().batches.create(input_file_id=batch_file.id, endpoint="/v1/responses", completion_window="24h")
+    return batch.id
+
+def wait_for_batch(batch_id, poll_interval=10, max_interval=300, on_status=None):
+    """Poll a batch with exponential backoff until it reaches a terminal status, then return it."""
+    interval = poll_interval
+    while True:
+        batch = get_client().batches.retrieve(batch_id)
+        if on_status:
+            on_status(batch)
+        if batch.status in BATCH_TERMINAL_STATUSES:
+            return batch
+        time.sleep(interval)
+        interval = min(interval * 2, max_interval)
+
+def collect_article_batch(batch, topics, tone="informal", article_type="guide", model=None):
+    """
+    Parse a finished batch's output into a list aligned with topics (None where a request failed).
+    Successful articles are also written to the response cache so later single runs reuse them.
+    """
+    from openai.types.responses import Response
+    results = [None] * len(topics)
+    if not batch.output_file_id:
+        return results
+    content = get_client().files.content(batch.output_file_id).read()
+    for line in content.splitlines():
+        if not line.strip():
+            continue
+        record = orjson.loads(line)
+        index = int(record["custom_id"].rsplit("-", 1)[1])
+        body = (record.get("response") or {}).get("body")
+        if not body:
+            continue
+        data = _parse_article_response(Response.model_validate(body))
+        if data is not None:
+            request = _article_request(topics[index], tone, article_type, model, None)
+            cache_put("article", _cache_key("article", request), data)
+        results[index] = data
+    return results
+
 # --- Backward Compatibility Functions ---
 def generate_article_with_functions(keyword, tone="informal", word_count=1000, article_type="guide", model=None, temperature=None, keywords_list=None):
     """
@@ -278,17 +1015,7 @@ def generate_keywords(topic, keyword_count=15, keyword_types=None):
     return generate_keywords_with_tools(topic, keyword_count, keyword_types)
 
 def build_keyword_prompt(topic, keyword_count, keyword_types):
-    keyword_type_descriptions = {
-        "primary_keywords": "main target keywords (1-3 words)",
-        "long_tail_keywords": "longer, more specific phrases (4+ words)",
-        "question_keywords": "keywords that start with what, how, why, when, where, etc.",
-        "local_keywords": "keywords with location modifiers",
-        "related_keywords": "semantically related terms and synonyms"
-    }
-    types_section = ""
-    for keyword_type in keyword_types:
-        if keyword_type in keyword_type_descriptions:
-            types_section += f"- {keyword_type}: {keyword_type_descriptions[keyword_type]}\n"
+    types_section = _render_keyword_types(tuple(keyword_types))
     return f"""
 Generate SEO keywords for the topic: "{topic}"
 
@@ -328,54 +1055,143 @@ Make sure all keywords are:
 """
 
 def display_keywords(keywords_data):
-    print(f"\n🎯 Keywords for: {keywords_data.get('topic', 'Unknown Topic')}")
-    print("=" * 50)
+    lines = [f"\n🎯 Keywords for: {keywords_data.get('topic', 'Unknown Topic')}", "=" * 50]
     keywords = keywords_data.get('keywords', {})
-    for keyword_type, keyword_list in keywords.items():
-        if keyword_list:
-            print(f"\n📌 {keyword_type.replace('_', ' ').title()}:")
-            for i, keyword in enumerate(keyword_list, 1):
-                print(f"   {i}. {keyword}")
+    for keyword_type, keyword_list in ((k, v) for k, v in keywords.items() if v):
+        lines.append(f"\n📌 {keyword_type.replace('_', ' ').title()}:")
+        lines.extend(f"   {i}. {keyword}" for i, keyword in enumerate(keyword_list, 1))
     insights = keywords_data.get('seo_insights', {})
     if insights:
-        print(f"\n📊 SEO Insights:")
-        print(f"   Search Volume: {insights.get('search_volume_estimate', 'Unknown')}")
-        print(f"   Competition: {insights.get('competition_level', 'Unknown')}")
-        print(f"   Recommended Focus: {insights.get('recommended_focus', 'All keywords')}")
+        lines.append(f"\n📊 SEO Insights:")
+        lines.append(f"   Search Volume: {insights.get('search_volume_estimate', 'Unknown')}")
+        lines.append(f"   Competition: {insights.get('competition_level', 'Unknown')}")
+        lines.append(f"   Recommended Focus: {insights.get('recommended_focus', 'All keywords')}")
+    # One write instead of a print() per keyword
+    sys.stdout.write("\n".join(lines) + "\n")
 
-def get_flat_keywords_list(topic, keyword_count=15, keyword_types=None):
-    data = generate_keywords(topic, keyword_count, keyword_types)
+def _flatten_keywords(keywords_data):
+    return list(itertools.chain.from_iterable(keywords_data.get('keywords', {}).values()))
+
+def get_flat_keywords_list(topic, keyword_count=15, keyword_types=None, use_cache=True):
+    data = generate_keywords_with_tools(topic, keyword_count, keyword_types, use_cache=use_cache)
     if data is None:
         return {"topic": topic, "keywords": []}
-    flat = []
-    for kw_list in data.get('keywords', {}).values():
-        flat.extend(kw_list)
-    return {"topic": topic, "keywords": flat}
+    return {"topic": topic, "keywords": _flatten_keywords(data)}
+
+# Spaces, path separators and characters Windows rejects in filenames all become "-" in one pass
+_SLUG_TABLE = str.maketrans(dict.fromkeys(' /\\:?*"<>|', "-"))
+
+def slugify(topic):
+    """Turn a topic into the filename slug used for saved files."""
+    return topic.lower().translate(_SLUG_TABLE)
+
+# Threads start lazily on first submit, so importing the module costs nothing
+_write_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="seo-write")
+
+# Only defined on Windows, where low-level fds otherwise open in text mode and rewrite \n as \r\n
+_O_BINARY = getattr(os, "O_BINARY", 0)
+
+def _write_file(path, payload):
+    """Write payload with raw os.write calls, bypassing Python's buffered file objects."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | _O_BINARY, 0o644)
+    try:
+        view = memoryview(payload)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+def write_files(payloads):
+    """Write each (path, bytes) pair with a single write call, overlapping the writes on a small thread pool."""
+    futures = [_write_pool.submit(_write_file, path, payload) for path, payload in payloads]
+    for future in futures:
+        future.result()
 
 def save_keywords_to_file(keywords_data, topic, output_dir=None):
-    if output_dir is None:
-        output_dir = os.path.expanduser('~/SEO articles')
-    os.makedirs(output_dir, exist_ok=True)
-    slug = topic.lower().replace(" ", "-").replace("/", "-")
-    filename = f"keywords-{slug}.json"
-    filepath = os.path.join(output_dir, filename)
-    with open(filepath, "w", encoding='utf-8') as f:
-        json.dump(keywords_data, f, indent=2, ensure_ascii=False)
+    output_dir = OUTPUT_DIR if output_dir is None else pathlib.Path(output_dir)
+    ensure_dir(output_dir)
+    filepath = output_dir / f"keywords-{slugify(topic)}.json"
+    _write_file(filepath, orjson.dumps(keywords_data, option=JSON_FILE_OPTIONS))
     return filepath
 
+def _meta_md(data):
+    meta = ""
+    if 'meta_title' in data:
+        meta += f"**Meta Title:** {data['meta_title']}\n\n"
+    if 'meta_description' in data:
+        meta += f"**Meta Description:** {data['meta_description']}\n\n"
+    return meta
+
+def _faq_md(data):
+    if not data.get('faq'):
+        return ""
+    items = "".join(f"**Q: {faq['question']}**\nA: {faq['answer']}\n\n" for faq in data['faq'])
+    return f"## Frequently Asked Questions\n\n{items}"
+
+def _tips_md(data):
+    if not data.get('seo_tips'):
+        return ""
+    items = "".join(f"- {tip}\n" for tip in data['seo_tips'])
+    return f"## SEO Optimization Tips\n\n{items}\n"
+
+def render_article_markdown(data):
+    """Render an article as Markdown with its meta block, sections, FAQ and SEO tips."""
+    sections = "".join(f"## {s['heading']}\n{s['content']}\n\n" for s in data.get('article_sections', []))
+    return f"# {data.get('article_title', 'Article Title')}\n\n{_meta_md(data)}{sections}{_faq_md(data)}{_tips_md(data)}"
+
+def _article_payloads(data, slug):
+    """Serialize the article JSON and Markdown up front, ready for write_files."""
+    return [
+        (OUTPUT_DIR / f"article-{slug}.json", orjson.dumps(data, option=JSON_FILE_OPTIONS)),
+        (OUTPUT_DIR / f"article-{slug}.md", render_article_markdown(data).encode('utf-8')),
+    ]
+
+def save_article(data, topic):
+    """Write article-<slug>.json and article-<slug>.md; returns both paths."""
+    ensure_dir(OUTPUT_DIR)
+    payloads = _article_payloads(data, slugify(topic))
+    write_files(payloads)
+    return payloads[0][0], payloads[1][0]
+
 def save_article_and_keywords(data, keywords_data, topic):
-    output_dir = os.path.expanduser('~/SEO articles')
-    os.makedirs(output_dir, exist_ok=True)
-    slug = topic.lower().replace(" ", "-").replace("/", "-")
-    json_path = os.path.join(output_dir, f"article-{slug}.json")
-    md_path = os.path.join(output_dir, f"article-{slug}.md")
-    keywords_path = os.path.join(output_dir, f"keywords-{slug}.json")
-    with open(json_path, "w", encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-    with open(md_path, "w", encoding='utf-8') as f:
-        f.write(f"# {data['article_title']}\n\n")
-        for section in data['article_sections']:
-            f.write(f"## {section['heading']}\n{section['content']}\n\n")
-    with open(keywords_path, "w", encoding='utf-8') as f:
-        json.dump(keywords_data, f, indent=2, ensure_ascii=False)
-    return json_path, md_path, keywords_path 
\ No newline at end of file
+    ensure_dir(OUTPUT_DIR)
+    slug = slugify(topic)
+    keywords_path = OUTPUT_DIR / f"keywords-{slug}.json"
+    # Serialize every payload before touching the disk, then issue the writes together
+    payloads = _article_payloads(data, slug)
+    payloads.append((keywords_path, orjson.dumps(keywords_data, option=JSON_FILE_OPTIONS)))
+    write_files(payloads)
+    return payloads[0][0], payloads[1][0], keywords_path
+
+async def asave_article_and_keywords(data, keywords_data, topic):
+    """Run save_article_and_keywords in a worker thread so the event loop keeps serving API calls."""
+    return await asyncio.to_thread(save_article_and_keywords, data, keywords_data, topic)
+
+def run_archive_path(output_dir=None, compress=False):
+    """Return a fresh run-<timestamp>.jsonl (or .jsonl.gz) path for aggregating a batch run's output."""
+    output_dir = OUTPUT_DIR if output_dir is None else pathlib.Path(output_dir)
+    ensure_dir(output_dir)
+    suffix = ".jsonl.gz" if compress else ".jsonl"
+    return output_dir / f"run-{time.strftime('%Y%m%d-%H%M%S')}{suffix}"
+
+def save_article_and_keywords_aggregated(data, keywords_data, topic, archive_path):
+    """
+    Append an article and its keywords to a single JSONL run archive
+    instead of writing three separate files per topic.
+    """
+    payload = b"".join([
+        orjson.dumps({"type": "article", "topic": topic, "data": data}), b"\n",
+        orjson.dumps({"type": "keywords", "topic": topic, "data": keywords_data}), b"\n",
+    ])
+    if pathlib.Path(archive_path).suffix == ".gz":
+        # Each append becomes its own gzip member; gzip readers treat concatenated members as one stream
+        payload = gzip.compress(payload, compresslevel=6)
+    with open(archive_path, "ab") as f:
+        f.write(payload)
+    return archive_path
+
+def load_run_archive(archive_path):
+    """Read back the records of a run archive, decompressing .gz archives transparently."""
+    opener = gzip.open if pathlib.Path(archive_path).suffix == ".gz" else open
+    with opener(archive_path, "rb") as f:
+        return [orjson.loads(line) for line in f if line.strip()]